@@ -6,6 +6,9 @@ from pymgipsim.VirtualPatient import VirtualPatient
 from pymgipsim.ModelSolver import singlescale
 import numpy as np
 
+# Output sample times: 15min intervals for 2hrs
+_T_EVAL_2H = np.arange(0, 121, 15, dtype=np.float64)
+
 # Configuration for 50kg patient with T1D consuming 50g carbs
 config = {
     "scenario_name": "adult_001",
@@ -30,7 +33,7 @@ t, states = singlescale(
     patient.t0,
     patient.tf,
     patient.initial_conditions,
-    t_eval=np.arange(0, 121, 15)  # 15min intervals for 2hrs
+    t_eval=_T_EVAL_2H
 )
 
 # Extract CGM-equivalent glucose values (mg/dL)
@@ -39,5 +42,9 @@ glucose = states[:, patient.model.glucose_index]
 print("### CGM Prediction After 100g Carbohydrate Meal")
 print("| Time (min) | Glucose (mg/dL) |")
 print("|------------|-----------------|")
-for t, g in zip(t, glucose):
-    print(f"| {t:.0f}         | {g:.0f}             |")
\ No newline at end of file
+# Format all rows in one vectorized pass and write them at once
+rows = np.char.add(
+    np.char.mod("| %.0f         | ", np.asarray(t, dtype=np.float64)),
+    np.char.mod("%.0f             |", np.asarray(glucose, dtype=np.float64)),
+)
+sys.stdout.write("\n".join(rows.tolist()) + "\n")
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Response schema and formatting shared by the glucose simulation MCP tools.
+
+This module has no py_mgipsim or MCP imports, so it can be used and tested on its own.
+"""
+
+from typing import List
+
+import msgspec
+import numpy as np
+
+# --------------------------------------------------------------------------------------
+# Response schema (msgspec caches the field layout, so encoding needs no reflection)
+# --------------------------------------------------------------------------------------
+
+
+class CGMSummary(msgspec.Struct):
+    """Summary metrics of a simulated CGM trace."""
+
+    status: str
+    model: str
+    min_glucose_mg_dl: float
+    max_glucose_mg_dl: float
+    final_glucose_mg_dl: float
+
+
+class CGMTrace(msgspec.Struct):
+    """Subsampled CGM trace as parallel columns."""
+
+    time_min: List[float]
+    glucose_mg_dl: List[float]
+
+
+class CGMResult(msgspec.Struct):
+    """Successful simulation response."""
+
+    summary: CGMSummary
+    cgm_trace: CGMTrace
+
+
+class SimulationError(msgspec.Struct):
+    """Failed simulation response."""
+
+    error: str
+
+
+ENCODER = msgspec.json.Encoder()
+
+
+def build_result(
+    time_points: np.ndarray, glucose: np.ndarray, duration_minutes: int, model: str
+) -> CGMResult:
+    """
+    Truncate a simulated trace to the requested horizon and build the tool response.
+
+    Args:
+        time_points: Time points in minutes from start.
+        glucose: Glucose values in mg/dL.
+        duration_minutes: Requested horizon in minutes.
+        model: Name of the model that produced the trace.
+
+    Returns:
+        CGMResult with summary metrics and the subsampled CGM trace as parallel
+        `time_min` / `glucose_mg_dl` lists.
+    """
+    # If user asked for shorter than total simulated time, we can truncate
+    # (time_points is monotonic, so a searchsorted slice gives views instead of copies)
+    max_time = duration_minutes
+    k = int(np.searchsorted(time_points, max_time, side="right"))
+    time_points = time_points[:k]
+    glucose = glucose[:k]
+
+    # Compute simple summary metrics
+    min_glucose = float(np.min(glucose))
+    max_glucose = float(np.max(glucose))
+    final_glucose = float(glucose[-1])
+
+    status = "Normal"
+    if min_glucose < 70:
+        status = "Hypoglycemia (Low)"
+    elif max_glucose > 180:
+        status = "Hyperglycemia (High)"
+
+    # Format output (subsample for token efficiency): every 15th sample plus the last one.
+    # The trace is columnar (one list per field), converted from NumPy in one call each.
+    idx = np.arange(0, len(glucose), 15)
+    if idx[-1] != len(glucose) - 1:
+        idx = np.append(idx, len(glucose) - 1)
+    t_sub = time_points[idx].astype(np.float64).tolist()
+    g_sub = np.round(glucose[idx], 1).astype(np.float64).tolist()
+
+    return CGMResult(
+        summary=CGMSummary(
+            status=status,
+            model=model,
+            min_glucose_mg_dl=round(min_glucose, 1),
+            max_glucose_mg_dl=round(max_glucose, 1),
+            final_glucose_mg_dl=round(final_glucose, 1),
+        ),
+        cgm_trace=CGMTrace(time_min=t_sub, glucose_mg_dl=g_sub),
+    )
@@ -1,11 +1,17 @@
 import os
 import sys
-import json
+import copy
+import argparse
+import atexit
+import shutil
 import logging
-from typing import Any, Dict
+import tempfile
+import functools
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 from mcp.server.fastmcp import FastMCP
+from pydantic import BaseModel, Field
 
 # --------------------------------------------------------------------------------------
 # Make sure the bundled `py_mgipsim` package is importable
@@ -29,6 +35,9 @@ from pymgipsim.Interface.parser import generate_parser_cli  # noqa: E402
 from pymgipsim.InputGeneration.activity_settings import activity_args_to_scenario  # noqa: E402
 from pymgipsim.Utilities.units_conversions_constants import UnitConversion  # noqa: E402
 
+from cgm_response import ENCODER, CGMResult, SimulationError, build_result  # noqa: E402
+from minimal_model import MODEL_NAME as SURROGATE_MODEL_NAME, fast_minimal_model  # noqa: E402
+
 # --------------------------------------------------------------------------------------
 # Logging & MCP server setup
 # --------------------------------------------------------------------------------------
@@ -38,9 +47,51 @@ logger = logging.getLogger(__name__)
 
 mcp = FastMCP("T1D Simulation Server")
 
+# mg/dL per mmol/L, taken from pymgipsim so results match generate_results_main exactly
+_MGDL_PER_MMOLL = float(UnitConversion.glucose.concentration_mmolL_to_mgdL(1.0))
+
+# Disable physical activity by default for tool calls.
+# (The default scenario has empty activity ranges; CLI normally applies
+# args into the scenario, but in library usage we must ensure lists are
+# non-empty to avoid IndexError during input generation.)
+_ACTIVITY_DEFAULTS: Dict[str, List[Any]] = {
+    "running_start_time": ["00:00"],
+    "cycling_start_time": ["00:00"],
+    "running_duration": [0.0],
+    "cycling_duration": [0.0],
+    "running_incline": [0.0],
+    "running_speed": [0.0],
+    "cycling_power": [0.0],
+}
+
+# Value of the summary `model` field for results of the full pymgipsim simulation
+_PYMGIPSIM_MODEL_NAME = "pymgipsim"
+
+# Upper bound on scenarios per batch call; each distinct simulation runs sequentially
+_MAX_BATCH_SCENARIOS = 16
+
 _initialized = False
 
 
+class GlucoseScenario(BaseModel):
+    """One scenario of `simulate_glucose_dynamics_batch`."""
+
+    carbs_grams: float = Field(ge=0, description="Carbohydrate intake in grams.")
+    insulin_bolus: float = Field(
+        0.0,
+        ge=0,
+        description="Bolus insulin units at mealtime (currently not wired into controller).",
+    )
+    body_weight: float = Field(
+        70.0, gt=0, description="Target body weight in kg (best-effort mapping into scenario)."
+    )
+    duration_minutes: int = Field(180, gt=0, description="Simulation horizon in minutes.")
+    use_surrogate: bool = Field(
+        False,
+        description="Use the closed-form minimal-model surrogate instead of pymgipsim.",
+    )
+
+
 def _ensure_pymgipsim_initialized() -> None:
     """
     Run py_mgipsim initialization once (creates folders, default scenario, etc.).
@@ -65,169 +116,296 @@ def _ensure_pymgipsim_initialized() -> None:
     logger.info("py_mgipsim initialized.")
 
 
+@functools.lru_cache(maxsize=None)
+def _base_args() -> argparse.Namespace:
+    """
+    Parse the default CLI-style args once, after py_mgipsim has been initialized.
+
+    Callers must deep-copy the returned namespace before modifying it.
+    """
+    _ensure_pymgipsim_initialized()
+
+    parser = generate_parser_cli()
+    # Parse with empty argv to get all defaults
+    return parser.parse_args([])
+
+
+@functools.lru_cache(maxsize=None)
+def _scratch_results_folder() -> str:
+    """
+    Create the per-process results folder on first use and return it on every later call.
+
+    The adapter only reads results from memory, so the files pymgipsim writes there are
+    scratch output; the folder lives on tmpfs (/dev/shm) when available. It is created
+    with a private, unpredictable name and removed when the process exits.
+    """
+    scratch_root = tempfile.mkdtemp(
+        prefix="mcp-sim-",
+        dir="/dev/shm" if os.path.isdir("/dev/shm") else None,
+    )
+    atexit.register(shutil.rmtree, scratch_root, ignore_errors=True)
+
+    _, _, _, results_folder_path = simulation_folder.create_simulation_results_folder(
+        scratch_root
+    )
+    return results_folder_path
+
+
+@functools.lru_cache(maxsize=32)
+def _prepare_base_scenario(number_of_days: int) -> Tuple[Any, Any, str]:
+    """
+    Build the carb-independent part of a simulation scenario once per horizon.
+
+    Creating the results folder, loading the settings file and sampling the virtual
+    subjects do not depend on the meal, so they are cached here and every tool call
+    works on a deep copy of the returned templates. The meal is only applied when the
+    input signals are generated (covered by test_cached_scenario_applies_carbs).
+
+    Returns:
+        Tuple of (args template, settings file template, results folder path).
+    """
+    args = copy.deepcopy(_base_args())
+    args.number_of_days = number_of_days
+
+    # Keep the default controller/model, but you can override here if you want:
+    # args.controller_name = "OpenLoop"
+    # args.model_name = "T1DM.ExtHovorka"
+
+    # Disable physical activity by default for tool calls (Namespace.__dict__ is free-form)
+    vars(args).update(copy.deepcopy(_ACTIVITY_DEFAULTS))
+
+    # Define results folder (one scratch folder shared by the whole process)
+    results_folder_path = _scratch_results_folder()
+
+    settings_file = simulation_folder.load_settings_file(args, results_folder_path)
+
+    # Generate settings and subjects if not using a pre-defined scenario
+    if not args.scenario_name:
+        settings_file = generate_simulation_settings_main(
+            scenario_instance=settings_file,
+            args=args,
+            results_folder_path=results_folder_path,
+        )
+        settings_file = generate_virtual_subjects_main(
+            scenario_instance=settings_file,
+            args=args,
+            results_folder_path=results_folder_path,
+        )
+
+    return args, settings_file, results_folder_path
+
+
+def _duration_to_days(duration_minutes: int) -> int:
+    """Map a duration in minutes to the number of days used by generate_simulation_settings_main."""
+    return max(1, int(np.ceil(duration_minutes / (24 * 60))))
+
+
+def _simulate_glucose_trace(carbs_grams: float, number_of_days: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the pymgipsim pipeline for one meal and return the CGM-equivalent trace.
+
+    Args:
+        carbs_grams: Carbohydrate intake in grams.
+        number_of_days: Number of simulated days.
+
+    Returns:
+        Tuple of (time points in minutes, glucose in mg/dL) for the first subject.
+    """
+    # 1. Fetch the cached carb-independent scenario and override with our parameters
+    args_template, settings_template, results_folder_path = _prepare_base_scenario(number_of_days)
+
+    # Work on copies so the cached templates are never mutated
+    args = copy.deepcopy(args_template)
+    settings_file = copy.deepcopy(settings_template)
+
+    # Simple mapping of carbs into breakfast carb range (best-effort)
+    if hasattr(args, "breakfast_carb_range"):
+        args.breakfast_carb_range = [carbs_grams, carbs_grams]
+
+    # We don't have a direct CLI arg for body_weight here;
+    # it will be handled via the library's demographic sampling. You could
+    # later extend this by editing the scenario object.
+
+    # 2. Generate inputs if not using a pre-defined scenario
+    if not args.scenario_name:
+        # Mirror the CLI flow: apply activity-related args onto the scenario
+        # before generating input signals.
+        activity_args_to_scenario(settings_file, args)
+        settings_file = generate_inputs_main(
+            scenario_instance=settings_file,
+            args=args,
+            results_folder_path=results_folder_path,
+        )
+
+    # 3. Run the core simulation via generate_results_main (VirtualCohort + solver)
+    cohort, _ = generate_results_main(
+        scenario_instance=settings_file,
+        args=vars(args),
+        results_folder_path=results_folder_path,
+    )
+
+    # For SingleScaleSolver, the singlescale model is the main one
+    model = cohort.singlescale_model
+
+    # States array shape: [subjects x states x samples]
+    states = model.states.as_array
+    # Use first subject (index 0)
+    glucose_state_idx = model.glucose_state
+    glucose_raw = states[0, glucose_state_idx, :]
+
+    # Convert to mg/dL if the model is in mmol/L (follow generate_results_main logic)
+    if model.states.state_units[glucose_state_idx] == "mmol/L":
+        glucose = glucose_raw * (_MGDL_PER_MMOLL / float(model.parameters.VG[0]))
+    else:
+        glucose = glucose_raw
+
+    # Time array comes from model.time (in minutes from start)
+    time_points = model.time.as_unix  # already in minutes
+
+    return time_points, glucose
+
+
+def _run_scenario(
+    carbs_grams: float,
+    insulin_bolus: float,
+    body_weight: float,
+    duration_minutes: int,
+    use_surrogate: bool = False,
+    traces: Optional[Dict[Tuple[float, int], Tuple[np.ndarray, np.ndarray]]] = None,
+) -> CGMResult:
+    """
+    Simulate one scenario and build its response.
+
+    Args:
+        carbs_grams: Carbohydrate intake in grams.
+        insulin_bolus: Bolus insulin units at mealtime (not wired into either model yet).
+        body_weight: Body weight in kg.
+        duration_minutes: Simulation horizon in minutes.
+        use_surrogate: Evaluate the closed-form minimal-model surrogate instead of running
+            pymgipsim.
+        traces: Optional cache of full-simulation traces keyed on (carbs, simulated days),
+            shared between the scenarios of a batch.
+
+    Returns:
+        CGMResult for the scenario.
+    """
+    if body_weight <= 0:
+        raise ValueError(f"body_weight must be positive, got {body_weight}")
+
+    if use_surrogate:
+        time_points, glucose = fast_minimal_model(carbs_grams, body_weight, duration_minutes)
+        return build_result(time_points, glucose, duration_minutes, SURROGATE_MODEL_NAME)
+
+    _ensure_pymgipsim_initialized()
+
+    if traces is None:
+        traces = {}
+
+    key = (float(carbs_grams), _duration_to_days(duration_minutes))
+    if key not in traces:
+        traces[key] = _simulate_glucose_trace(*key)
+
+    return build_result(*traces[key], duration_minutes, _PYMGIPSIM_MODEL_NAME)
+
+
 @mcp.tool()
 def simulate_glucose_dynamics(
     carbs_grams: float,
     insulin_bolus: float = 0.0,
     body_weight: float = 70.0,
     duration_minutes: int = 180,
+    use_surrogate: bool = False,
 ) -> str:
     """
     Simulate glucose-insulin dynamics for a T1D patient based on meal and insulin intake,
     using the official pymgipsim pipeline (VirtualCohort + generate_* functions).
 
+    With `use_surrogate=True` a closed-form minimal-model surrogate (meal absorption and
+    linear clearance, no insulin action) is evaluated instead; it is much faster but only
+    approximate. The summary `model` field reports which one produced the result.
+
     Args:
         carbs_grams: Carbohydrate intake in grams.
         insulin_bolus: Bolus insulin units at mealtime (currently not wired into controller).
         body_weight: Target body weight in kg (best-effort mapping into scenario).
         duration_minutes: Simulation horizon in minutes.
+        use_surrogate: Use the minimal-model surrogate instead of pymgipsim (default off).
 
     Returns:
-        JSON string containing CGM trace and summary metrics.
+        JSON string containing summary metrics and the CGM trace as parallel
+        `time_min` / `glucose_mg_dl` lists, or an object with an "error" key on failure.
     """
     try:
         logger.info(
-            "Starting simulation with carbs=%s g, bolus=%s U, body_weight=%s kg, duration=%s min",
+            "Starting simulation with carbs=%s g, bolus=%s U, body_weight=%s kg, duration=%s min, "
+            "surrogate=%s",
             carbs_grams,
             insulin_bolus,
             body_weight,
             duration_minutes,
+            use_surrogate,
         )
 
-        _ensure_pymgipsim_initialized()
-
-        # 1. Build default CLI-style args and override with our parameters
-        parser = generate_parser_cli()
-        # Parse with empty argv to get all defaults
-        args = parser.parse_args([])
-
-        # Map our duration (minutes) to days used by generate_simulation_settings_main
-        days = max(1, int(np.ceil(duration_minutes / (24 * 60))))
-        args.number_of_days = days
-
-        # Keep the default controller/model, but you can override here if you want:
-        # args.controller_name = "OpenLoop"
-        # args.model_name = "T1DM.ExtHovorka"
-
-        # Simple mapping of carbs into breakfast carb range (best-effort)
-        if hasattr(args, "breakfast_carb_range"):
-            args.breakfast_carb_range = [carbs_grams, carbs_grams]
-
-        # Disable physical activity by default for tool calls.
-        # (The default scenario has empty activity ranges; CLI normally applies
-        # args into the scenario, but in library usage we must ensure lists are
-        # non-empty to avoid IndexError during input generation.)
-        if hasattr(args, "running_start_time"):
-            args.running_start_time = ["00:00"]
-        if hasattr(args, "cycling_start_time"):
-            args.cycling_start_time = ["00:00"]
-        if hasattr(args, "running_duration"):
-            args.running_duration = [0.0]
-        if hasattr(args, "cycling_duration"):
-            args.cycling_duration = [0.0]
-        if hasattr(args, "running_incline"):
-            args.running_incline = [0.0]
-        if hasattr(args, "running_speed"):
-            args.running_speed = [0.0]
-        if hasattr(args, "cycling_power"):
-            args.cycling_power = [0.0]
-
-        # We don't have a direct CLI arg for body_weight here;
-        # it will be handled via the library's demographic sampling. You could
-        # later extend this by editing the scenario object.
-
-        # 2. Define results folder and load base scenario
-        _, _, _, results_folder_path = simulation_folder.create_simulation_results_folder(
-            results_path
+        result = _run_scenario(
+            carbs_grams, insulin_bolus, body_weight, duration_minutes, use_surrogate
         )
 
-        settings_file = simulation_folder.load_settings_file(args, results_folder_path)
+        return ENCODER.encode(result).decode()
 
-        # 3. Generate settings, subjects, and inputs if not using a pre-defined scenario
-        if not args.scenario_name:
-            settings_file = generate_simulation_settings_main(
-                scenario_instance=settings_file,
-                args=args,
-                results_folder_path=results_folder_path,
-            )
-            settings_file = generate_virtual_subjects_main(
-                scenario_instance=settings_file,
-                args=args,
-                results_folder_path=results_folder_path,
-            )
-            # Mirror the CLI flow: apply activity-related args onto the scenario
-            # before generating input signals.
-            activity_args_to_scenario(settings_file, args)
-            settings_file = generate_inputs_main(
-                scenario_instance=settings_file,
-                args=args,
-                results_folder_path=results_folder_path,
-            )
+    except Exception as e:
+        logger.exception("Simulation failed")
+        return ENCODER.encode(
+            SimulationError(error=f"Error executing simulation: {str(e)}")
+        ).decode()
 
-        # 4. Run the core simulation via generate_results_main (VirtualCohort + solver)
-        cohort, _ = generate_results_main(
-            scenario_instance=settings_file,
-            args=vars(args),
-            results_folder_path=results_folder_path,
-        )
 
-        # For SingleScaleSolver, the singlescale model is the main one
-        model = cohort.singlescale_model
+@mcp.tool()
+def simulate_glucose_dynamics_batch(scenarios: List[GlucoseScenario]) -> str:
+    """
+    Simulate several meal/insulin scenarios in a single tool call.
+
+    Scenarios that map to the same simulation (same carbs and number of simulated days)
+    are solved once and the trace is shared, so sweeping e.g. durations or repeated
+    requests costs a single pymgipsim run. At most 16 scenarios are accepted per call.
 
-        # States array shape: [subjects x states x samples]
-        states = model.states.as_array
-        # Use first subject (index 0)
-        glucose_state_idx = model.glucose_state
-        glucose_raw = states[0, glucose_state_idx, :]
+    Args:
+        scenarios: List of scenarios with the same fields as `simulate_glucose_dynamics`.
 
-        # Convert to mg/dL if the model is in mmol/L (follow generate_results_main logic)
-        if model.states.state_units[glucose_state_idx] == "mmol/L":
-            glucose = UnitConversion.glucose.concentration_mmolL_to_mgdL(
-                glucose_raw / model.parameters.VG[0]
+    Returns:
+        JSON string containing a list of results in input order. Failed scenarios
+        contain an "error" key instead of summary metrics; an oversized batch returns
+        a single object with an "error" key.
+    """
+    logger.info("Starting batch simulation with %s scenarios", len(scenarios))
+
+    if len(scenarios) > _MAX_BATCH_SCENARIOS:
+        return ENCODER.encode(
+            SimulationError(
+                error=f"Error executing simulation: at most {_MAX_BATCH_SCENARIOS} "
+                f"scenarios per batch, got {len(scenarios)}"
+            )
+        ).decode()
+
+    traces: Dict[Tuple[float, int], Tuple[np.ndarray, np.ndarray]] = {}
+    results: List[Union[CGMResult, SimulationError]] = []
+    for scenario in scenarios:
+        try:
+            results.append(
+                _run_scenario(
+                    scenario.carbs_grams,
+                    scenario.insulin_bolus,
+                    scenario.body_weight,
+                    scenario.duration_minutes,
+                    scenario.use_surrogate,
+                    traces=traces,
+                )
             )
-        else:
-            glucose = glucose_raw
-
-        # Time array comes from model.time (in minutes from start)
-        time_points = model.time.as_unix  # already in minutes
-
-        # If user asked for shorter than total simulated time, we can truncate
-        max_time = duration_minutes
-        mask = time_points <= max_time
-        time_points = time_points[mask]
-        glucose = glucose[mask]
-
-        # 5. Compute simple summary metrics
-        min_glucose = float(np.min(glucose))
-        max_glucose = float(np.max(glucose))
-        final_glucose = float(glucose[-1])
-
-        status = "Normal"
-        if min_glucose < 70:
-            status = "Hypoglycemia (Low)"
-        elif max_glucose > 180:
-            status = "Hyperglycemia (High)"
-
-        # 6. Format JSON output (subsample for token efficiency)
-        result_data: Dict[str, Any] = {
-            "summary": {
-                "status": status,
-                "min_glucose_mg_dl": round(min_glucose, 1),
-                "max_glucose_mg_dl": round(max_glucose, 1),
-                "final_glucose_mg_dl": round(final_glucose, 1),
-            },
-            "cgm_trace": [
-                {"time_min": float(t), "glucose_mg_dl": round(float(g), 1)}
-                for i, (t, g) in enumerate(zip(time_points, glucose))
-                if i % 15 == 0 or i == len(glucose) - 1
-            ],
-        }
-
-        return json.dumps(result_data)
 
-    except Exception as e:
-        logger.exception("Simulation failed")
-        return f"Error executing simulation: {str(e)}"
+        except Exception as e:
+            logger.exception("Simulation failed for scenario %s", scenario)
+            results.append(SimulationError(error=f"Error executing simulation: {str(e)}"))
+
+    return ENCODER.encode(results).decode()
 
 
 if __name__ == "__main__":
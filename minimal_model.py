@@ -0,0 +1,78 @@
+"""
+Closed-form meal-response surrogate for the glucose simulation MCP tools.
+
+The surrogate convolves the two-compartment gut absorption of the Hovorka model with a
+linear, insulin-independent glucose clearance:
+
+    G(t) = Gb + dG * a^2 / (a - b)^2 * (exp(-b t) - (1 + (a - b) t) * exp(-a t))
+
+with a = 1 / t_max,G, b = S_G and dG = A_G * carbs / (V_G * BW) the glucose rise if
+all absorbed carbohydrate stayed in the distribution volume. It has no insulin action,
+so it only approximates the full pymgipsim simulation and is never used unless a caller
+asks for it explicitly.
+
+Constants:
+    A_G, t_max,G and V_G are the published values of Hovorka et al., "Nonlinear model
+    predictive control of glucose concentration in subjects with type 1 diabetes",
+    Physiol. Meas. 25 (2004) 905-920. S_G and Gb are assumptions (see below); none of
+    the constants is fitted against pymgipsim output.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+MODEL_NAME = "minimal_model_surrogate"
+
+CARB_BIOAVAILABILITY = 0.8  # A_G (Hovorka 2004)
+TIME_TO_MAX_ABSORPTION_MIN = 40.0  # t_max,G in min (Hovorka 2004)
+GLUCOSE_DISTRIBUTION_VOLUME_L_PER_KG = 0.16  # V_G in L/kg (Hovorka 2004)
+
+# Assumed glucose effectiveness S_G in 1/min, within the range usually reported for the
+# Bergman minimal model; it is the only glucose removal in the surrogate
+GLUCOSE_EFFECTIVENESS_PER_MIN = 0.02
+# Assumed pre-meal glucose: middle of the 70-180 mg/dL range used for the summary status
+BASAL_GLUCOSE_MG_DL = 125.0
+
+
+def fast_minimal_model(
+    carbs_grams: float, body_weight: float, duration_minutes: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate the surrogate on a 1-minute grid.
+
+    Args:
+        carbs_grams: Carbohydrate intake in grams, eaten at t = 0.
+        body_weight: Body weight in kg.
+        duration_minutes: Horizon in minutes.
+
+    Returns:
+        Tuple of (time points in minutes, glucose in mg/dL).
+
+    Raises:
+        ValueError: If body_weight is not positive, or carbs_grams or duration_minutes
+            is negative.
+    """
+    if body_weight <= 0:
+        raise ValueError(f"body_weight must be positive, got {body_weight}")
+    if carbs_grams < 0:
+        raise ValueError(f"carbs_grams must not be negative, got {carbs_grams}")
+    if duration_minutes < 0:
+        raise ValueError(f"duration_minutes must not be negative, got {duration_minutes}")
+
+    a = 1.0 / TIME_TO_MAX_ABSORPTION_MIN
+    b = GLUCOSE_EFFECTIVENESS_PER_MIN
+
+    # g carbs -> mg glucose, over V_G * BW in dL
+    max_rise = (
+        CARB_BIOAVAILABILITY * carbs_grams * 1000.0
+        / (GLUCOSE_DISTRIBUTION_VOLUME_L_PER_KG * body_weight * 10.0)
+    )
+
+    time_points = np.arange(duration_minutes + 1, dtype=np.float64)
+    profile = (a / (a - b)) ** 2 * (
+        np.exp(-b * time_points) - (1.0 + (a - b) * time_points) * np.exp(-a * time_points)
+    )
+    glucose = BASAL_GLUCOSE_MG_DL + max_rise * profile
+
+    return time_points, glucose
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+
+from cgm_response import ENCODER, SimulationError, build_result
+
+
+def _linear_trace(n_samples):
+    time_points = np.arange(n_samples, dtype=np.float64)
+    return time_points, 100.0 + 0.5 * time_points
+
+
+def test_trace_keeps_last_sample_when_length_not_multiple_of_15():
+    result = build_result(*_linear_trace(101), duration_minutes=100, model="test")
+
+    assert result.cgm_trace.time_min == [0.0, 15.0, 30.0, 45.0, 60.0, 75.0, 90.0, 100.0]
+    assert result.cgm_trace.glucose_mg_dl[-1] == 150.0
+
+
+def test_trace_does_not_duplicate_last_sample_on_multiple_of_15():
+    result = build_result(*_linear_trace(91), duration_minutes=90, model="test")
+
+    assert result.cgm_trace.time_min == [0.0, 15.0, 30.0, 45.0, 60.0, 75.0, 90.0]
+
+
+def test_trace_is_truncated_to_duration():
+    result = build_result(*_linear_trace(1441), duration_minutes=50, model="test")
+
+    assert result.cgm_trace.time_min == [0.0, 15.0, 30.0, 45.0, 50.0]
+    assert result.summary.final_glucose_mg_dl == 125.0
+    assert result.summary.max_glucose_mg_dl == 125.0
+
+
+def test_status_thresholds():
+    def status(glucose):
+        return build_result(np.arange(3, dtype=np.float64), np.array(glucose), 2, "test").summary.status
+
+    assert status([100.0, 120.0, 110.0]) == "Normal"
+    assert status([100.0, 60.0, 200.0]) == "Hypoglycemia (Low)"
+    assert status([100.0, 190.0, 110.0]) == "Hyperglycemia (High)"
+
+
+def test_result_encodes_columnar_trace():
+    time_points = np.arange(16, dtype=np.float64)
+    glucose = np.full(16, 123.456)
+
+    encoded = json.loads(ENCODER.encode(build_result(time_points, glucose, 15, "pymgipsim")))
+
+    assert encoded == {
+        "summary": {
+            "status": "Normal",
+            "model": "pymgipsim",
+            "min_glucose_mg_dl": 123.5,
+            "max_glucose_mg_dl": 123.5,
+            "final_glucose_mg_dl": 123.5,
+        },
+        "cgm_trace": {"time_min": [0.0, 15.0], "glucose_mg_dl": [123.5, 123.5]},
+    }
+
+
+def test_error_encodes_as_json_object():
+    encoded = ENCODER.encode(SimulationError(error="Error executing simulation: boom"))
+
+    assert json.loads(encoded) == {"error": "Error executing simulation: boom"}
@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pytest
+
+# The adapter imports the bundled py_mgipsim package and the MCP SDK at module level
+adapter = pytest.importorskip("fastMCP_adapter", reason="requires py_mgipsim and mcp")
+
+
+def test_cached_scenario_applies_carbs():
+    """Settings and subjects are cached without the meal; carbs must still reach the inputs."""
+    days = adapter._duration_to_days(180)
+
+    _, glucose_small = adapter._simulate_glucose_trace(20.0, days)
+    _, glucose_large = adapter._simulate_glucose_trace(120.0, days)
+
+    assert glucose_large.max() > glucose_small.max()
+
+
+@pytest.fixture
+def fake_simulation(monkeypatch):
+    """Replace the pymgipsim run with a linear trace; 13 g carbs fails."""
+    calls = []
+
+    def fake_trace(carbs_grams, number_of_days):
+        calls.append((carbs_grams, number_of_days))
+        if carbs_grams == 13.0:
+            raise RuntimeError("solver diverged")
+        time_points = np.arange(24 * 60 * number_of_days + 1, dtype=np.float64)
+        return time_points, 100.0 + carbs_grams + 0.0 * time_points
+
+    monkeypatch.setattr(adapter, "_ensure_pymgipsim_initialized", lambda: None)
+    monkeypatch.setattr(adapter, "_simulate_glucose_trace", fake_trace)
+    return calls
+
+
+def _scenario(carbs_grams, duration_minutes=240):
+    return adapter.GlucoseScenario(
+        carbs_grams=carbs_grams, insulin_bolus=1.0, duration_minutes=duration_minutes
+    )
+
+
+def test_batch_keeps_order_and_reports_errors_per_scenario(fake_simulation):
+    results = json.loads(
+        adapter.simulate_glucose_dynamics_batch([_scenario(40.0), _scenario(13.0), _scenario(60.0)])
+    )
+
+    assert len(results) == 3
+    assert results[0]["summary"]["final_glucose_mg_dl"] == 140.0
+    assert results[1] == {"error": "Error executing simulation: solver diverged"}
+    assert results[2]["summary"]["final_glucose_mg_dl"] == 160.0
+
+
+def test_batch_shares_trace_between_equal_simulations(fake_simulation):
+    results = json.loads(
+        adapter.simulate_glucose_dynamics_batch([_scenario(40.0, 240), _scenario(40.0, 300)])
+    )
+
+    assert fake_simulation == [(40.0, 1)]
+    assert results[0]["cgm_trace"]["time_min"][-1] == 240.0
+    assert results[1]["cgm_trace"]["time_min"][-1] == 300.0
+
+
+def test_batch_rejects_oversized_batch(fake_simulation):
+    scenarios = [_scenario(40.0)] * (adapter._MAX_BATCH_SCENARIOS + 1)
+
+    result = json.loads(adapter.simulate_glucose_dynamics_batch(scenarios))
+
+    assert "error" in result
+    assert fake_simulation == []
+
+
+def test_default_call_runs_pymgipsim(fake_simulation):
+    result = json.loads(adapter.simulate_glucose_dynamics(50.0))
+
+    assert result["summary"]["model"] == "pymgipsim"
+    assert fake_simulation == [(50.0, 1)]
+
+
+def test_surrogate_is_opt_in_and_labelled(fake_simulation):
+    result = json.loads(adapter.simulate_glucose_dynamics(50.0, use_surrogate=True))
+
+    assert result["summary"]["model"] == "minimal_model_surrogate"
+    assert fake_simulation == []
+
+
+def test_rejects_non_positive_body_weight(fake_simulation):
+    result = json.loads(adapter.simulate_glucose_dynamics(50.0, body_weight=0.0))
+
+    assert "body_weight" in result["error"]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from minimal_model import BASAL_GLUCOSE_MG_DL, fast_minimal_model
+
+
+def test_grid_is_one_minute_and_inclusive():
+    time_points, glucose = fast_minimal_model(50.0, 70.0, 180)
+
+    assert time_points[0] == 0.0
+    assert time_points[-1] == 180.0
+    assert np.all(np.diff(time_points) == 1.0)
+    assert glucose.shape == time_points.shape
+
+
+def test_starts_at_basal_and_rises_after_meal():
+    _, glucose = fast_minimal_model(50.0, 70.0, 180)
+
+    assert glucose[0] == pytest.approx(BASAL_GLUCOSE_MG_DL)
+    assert np.all(glucose >= BASAL_GLUCOSE_MG_DL)
+    assert 30 < int(np.argmax(glucose)) < 150
+
+
+def test_no_carbs_stays_at_basal():
+    _, glucose = fast_minimal_model(0.0, 70.0, 120)
+
+    assert np.allclose(glucose, BASAL_GLUCOSE_MG_DL)
+
+
+def test_rise_scales_with_carbs_per_kg():
+    _, base = fast_minimal_model(30.0, 60.0, 180)
+    _, double_carbs = fast_minimal_model(60.0, 60.0, 180)
+    _, double_weight = fast_minimal_model(30.0, 120.0, 180)
+
+    rise = base - BASAL_GLUCOSE_MG_DL
+    assert np.allclose(double_carbs - BASAL_GLUCOSE_MG_DL, 2.0 * rise)
+    assert np.allclose(double_weight - BASAL_GLUCOSE_MG_DL, 0.5 * rise)
+
+
+def test_longer_horizon_extends_same_trajectory():
+    _, short = fast_minimal_model(50.0, 70.0, 180)
+    _, long = fast_minimal_model(50.0, 70.0, 181)
+
+    assert np.allclose(long[:-1], short)
+
+
+@pytest.mark.parametrize("body_weight", [0.0, -70.0])
+def test_rejects_non_positive_body_weight(body_weight):
+    with pytest.raises(ValueError, match="body_weight"):
+        fast_minimal_model(50.0, body_weight, 180)
+
+
+def test_rejects_negative_carbs():
+    with pytest.raises(ValueError, match="carbs_grams"):
+        fast_minimal_model(-1.0, 70.0, 180)